@@ -1,7 +1,19 @@
 # Copyright 2019-present Kensho Technologies, LLC.
-from copy import copy
-import string
-from typing import Any, Dict, FrozenSet, List, Optional, Set, Type, TypeVar, Union
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from graphql import GraphQLSchema, build_ast_schema, specified_scalar_types
 from graphql.language.ast import (
@@ -10,22 +22,29 @@ from graphql.language.ast import (
     EnumTypeDefinitionNode,
     FieldDefinitionNode,
     FieldNode,
+    FragmentDefinitionNode,
     FragmentSpreadNode,
     InlineFragmentNode,
+    InputObjectTypeDefinitionNode,
     InterfaceTypeDefinitionNode,
     NamedTypeNode,
     NameNode,
     Node,
+    ObjectFieldNode,
     ObjectTypeDefinitionNode,
+    ObjectTypeExtensionNode,
+    ObjectValueNode,
+    OperationDefinitionNode,
     ScalarTypeDefinitionNode,
     SelectionSetNode,
     UnionTypeDefinitionNode,
+    VariableDefinitionNode,
+    VariableNode,
 )
 from graphql.language.visitor import Visitor, visit
 from graphql.type.definition import GraphQLScalarType
 from graphql.utilities.assert_valid_name import re_name
 from graphql.validation import validate
-import six
 
 from ..ast_manipulation import get_ast_with_non_null_and_list_stripped
 from ..exceptions import GraphQLError, GraphQLValidationError
@@ -272,9 +291,9 @@ class NoOpRenamingError(SchemaTransformError):
         )
 
 
-_alphanumeric_and_underscore: FrozenSet[str] = frozenset(
-    six.text_type(string.ascii_letters + string.digits + "_")
-)
+# Matches any character that is not alphanumeric or an underscore, i.e. any character that is
+# illegal in a schema identifier.
+_illegal_schema_identifier_character_pattern = re.compile(r"[^a-zA-Z0-9_]")
 
 
 # String representations for the GraphQL built-in scalar types
@@ -303,7 +322,7 @@ RenameTypes = Union[
 RenameTypesT = TypeVar("RenameTypesT", bound=RenameTypes)
 
 # For the same reason as with RenameTypes, these types have to be written out explicitly instead of
-# relying on allowed_types in get_copy_of_node_with_new_name.
+# relying on _renameable_node_type_to_non_name_keys, which get_copy_of_node_with_new_name uses.
 # Unlike RenameTypes, RenameNodes also includes fields because it's used in the function
 # get_copy_of_node_with_new_name which rename_query depends on to rename the root field in a query.
 # Meanwhile, RenameTypes applies only for rename_schema and field renaming in the schema is not
@@ -315,6 +334,21 @@ RenameNodes = Union[
 ]
 RenameNodesT = TypeVar("RenameNodesT", bound=RenameNodes)
 
+# The node types that get_copy_of_node_with_new_name accepts, mapped to the names of all their
+# attributes other than "name". Precomputed so that each copy only has to fill in these attributes.
+_renameable_node_type_to_non_name_keys: Dict[Type[Node], Tuple[str, ...]] = {
+    node_type: tuple(key for key in node_type.keys if key != "name")
+    for node_type in (
+        EnumTypeDefinitionNode,
+        FieldNode,
+        FieldDefinitionNode,
+        InterfaceTypeDefinitionNode,
+        NamedTypeNode,
+        ObjectTypeDefinitionNode,
+        UnionTypeDefinitionNode,
+    )
+}
+
 # Contains the node types that may be renamed in rename_query. NamedTypeNode is here for type
 # renaming and FieldNode is here for renaming field nodes in the root vertex (as described in
 # RenameQueryVisitor).
@@ -336,8 +370,12 @@ def check_schema_identifier_is_valid(identifier: str) -> None:
         raise ValueError('Schema identifier "{}" is not a string.'.format(identifier))
     if identifier == "":
         raise ValueError("Schema identifier must be a nonempty string.")
-    illegal_characters = frozenset(identifier) - _alphanumeric_and_underscore
-    if illegal_characters:
+    # Valid identifiers are the common case: searching for the first illegal character allocates
+    # nothing when there isn't one, so the set of illegal characters is only built on error.
+    if _illegal_schema_identifier_character_pattern.search(identifier) is not None:
+        illegal_characters = frozenset(
+            _illegal_schema_identifier_character_pattern.findall(identifier)
+        )
         raise ValueError(
             'Schema identifier "{}" contains illegal characters: {}'.format(
                 identifier, illegal_characters
@@ -385,12 +423,29 @@ def get_custom_scalar_names(schema: GraphQLSchema) -> Set[str]:
     type_map = schema.type_map
     custom_scalar_names = {
         type_name
-        for type_name, type_object in six.iteritems(type_map)
+        for type_name, type_object in type_map.items()
         if isinstance(type_object, GraphQLScalarType) and type_name not in builtin_scalar_type_names
     }
     return custom_scalar_names
 
 
+def _check_node_type_has_name(target_type: Type[Node]) -> None:
+    """Ensure instances of the given node type have a .name attribute that is a NameNode.
+
+    Checking the node type once up front lets callers read .name.value off every matching node
+    without checking each node individually.
+
+    Raises:
+        AssertionError if the node type does not have a .name attribute
+    """
+    if "name" not in target_type.keys:
+        raise AssertionError(
+            f"Node type {target_type} does not have a .name attribute. This should be impossible "
+            f"because target_type must have a .name attribute, and target_type's .name attribute "
+            f"must have a .value attribute."
+        )
+
+
 def try_get_ast_by_name_and_type(
     asts: Optional[List[Node]], target_name: str, target_type: Type[Node]
 ) -> Optional[Node]:
@@ -408,22 +463,40 @@ def try_get_ast_by_name_and_type(
     """
     if asts is None:
         return None
+    _check_node_type_has_name(target_type)
     for ast in asts:
         if isinstance(ast, target_type):
-            if not (hasattr(ast, "name") and hasattr(ast.name, "value")):  # type: ignore
-                # Can't type hint "has .name attribute"
-                raise AssertionError(
-                    f"AST {ast} is either missing a .name attribute or its .name attribute is "
-                    f"missing a .value attribute. This should be impossible because target_type "
-                    f"{target_type} must have a .name attribute, {target_type}'s .name attribute "
-                    f"must have a .value attribute, and the ast must be of type {target_type}."
-                )
             if ast.name.value == target_name:  # type: ignore
                 # Can't type hint "has .name attribute"
                 return ast
     return None
 
 
+def index_asts_by_name(asts: Optional[List[Node]], target_type: Type[Node]) -> Dict[str, Node]:
+    """Return a dict mapping names to asts in the list of the desired type.
+
+    Use this instead of repeated try_get_ast_by_name_and_type calls when looking up several names
+    in the same list of asts. If multiple asts of the desired type share a name, the last one wins.
+
+    Args:
+        asts: optional list of asts to index
+        target_type: type of the asts to index. Instances of this type must have a .name
+                     attribute, (e.g. FieldNode, DirectiveNode) and its .name attribute must have a
+                     .value attribute.
+
+    Returns:
+        dict mapping the name of each ast of the desired type in the input list to that ast
+    """
+    if asts is None:
+        return {}
+    _check_node_type_has_name(target_type)
+    return {
+        ast.name.value: ast  # type: ignore  # Can't type hint "has .name attribute"
+        for ast in asts
+        if isinstance(ast, target_type)
+    }
+
+
 def try_get_inline_fragment(
     selections: Optional[List[Union[FieldNode, InlineFragmentNode]]]
 ) -> Optional[InlineFragmentNode]:
@@ -441,24 +514,24 @@ def try_get_inline_fragment(
     """
     if selections is None:
         return None
-    inline_fragments_in_selection = [
-        selection for selection in selections if isinstance(selection, InlineFragmentNode)
-    ]
-    if len(inline_fragments_in_selection) == 0:
-        return None
-    elif len(inline_fragments_in_selection) == 1:
-        if len(selections) == 1:
-            return inline_fragments_in_selection[0]
+    inline_fragment = None
+    seen_non_inline_fragment = False
+    for selection in selections:
+        if isinstance(selection, InlineFragmentNode):
+            if inline_fragment is not None:
+                raise GraphQLValidationError(
+                    'Input selections "{}" contains multiple InlineFragments, which is not '
+                    "allowed.".format(selections)
+                )
+            inline_fragment = selection
         else:
-            raise GraphQLValidationError(
-                'Input selections "{}" contains both InlineFragments and Fields, which may not '
-                "coexist in one selection.".format(selections)
-            )
-    else:
+            seen_non_inline_fragment = True
+    if inline_fragment is not None and seen_non_inline_fragment:
         raise GraphQLValidationError(
-            'Input selections "{}" contains multiple InlineFragments, which is not allowed.'
-            "".format(selections)
+            'Input selections "{}" contains both InlineFragments and Fields, which may not '
+            "coexist in one selection.".format(selections)
         )
+    return inline_fragment
 
 
 def get_copy_of_node_with_new_name(node: RenameNodesT, new_name: str) -> RenameNodesT:
@@ -471,103 +544,130 @@ def get_copy_of_node_with_new_name(node: RenameNodesT, new_name: str) -> RenameN
     Returns:
         node with new_name as its name and otherwise identical to the input node
     """
-    node_type = type(node).__name__
-    allowed_types = frozenset(
-        (
-            "EnumTypeDefinitionNode",
-            "FieldNode",
-            "FieldDefinitionNode",
-            "InterfaceTypeDefinitionNode",
-            "NamedTypeNode",
-            "ObjectTypeDefinitionNode",
-            "UnionTypeDefinitionNode",
-        )
-    )
-    if node_type not in allowed_types:
+    node_type = type(node)
+    non_name_keys = _renameable_node_type_to_non_name_keys.get(node_type)
+    if non_name_keys is None:
         raise AssertionError(
             "Input node {} of type {} is not allowed, only {} are allowed.".format(
-                node, node_type, allowed_types
+                node,
+                node_type.__name__,
+                sorted(
+                    allowed_type.__name__ for allowed_type in _renameable_node_type_to_non_name_keys
+                ),
             )
         )
-    node_with_new_name = copy(node)  # shallow copy is enough
-    node_with_new_name.name = NameNode(value=new_name)
-    return node_with_new_name
+    # Shallow copy is enough. Constructing the new node directly with its new name is equivalent
+    # to copy(node) followed by replacing its name, but skips the generic copy machinery.
+    node_with_new_name = node_type(
+        name=NameNode(value=new_name), **{key: getattr(node, key) for key in non_name_keys}
+    )
+    return cast(RenameNodesT, node_with_new_name)
+
+
+def _raise_disallowed_node_type_error(node: Node) -> None:
+    """Raise SchemaStructureError for a node type not supported in renaming or merging."""
+    raise SchemaStructureError('Node type "{}" not allowed.'.format(type(node).__name__))
+
+
+def _raise_unexpected_node_type_error(node: Node) -> None:
+    """Raise SchemaStructureError for a node type not expected in a schema definition."""
+    raise SchemaStructureError(
+        'Node type "{}" unexpected in schema AST'.format(type(node).__name__)
+    )
 
 
-class CheckValidTypesAndNamesVisitor(Visitor):
-    """Check that the AST does not contain invalid types or types with invalid names.
+def _check_node_name_is_valid_nonreserved(node: Node) -> None:
+    """Raise InvalidNameError if the node's name is not a valid, non-reserved GraphQL name."""
+    node_name = node.name.value  # type: ignore  # Can't type hint "has .name attribute"
+    if not is_valid_nonreserved_name(node_name):
+        raise InvalidNameError(
+            f"Node name {node_name} is not a valid, non-reserved GraphQL name. "
+            f"Valid, non-reserved GraphQL names must consist of only alphanumeric "
+            f"characters and underscores, must not start with a numeric character, and "
+            f"must not start with double underscores."
+        )
+
+
+class CheckAstSchemaIsValidVisitor(Visitor):
+    """Check the schema AST's node types and names, as well as its query type's field names.
 
-    If AST contains invalid types, raise SchemaStructureError; if AST contains types with
-    invalid names, raise InvalidNameError.
+    If AST contains invalid types, or if some query type field's name is not identical to the type
+    it queries, raise SchemaStructureError; if AST contains types with invalid names, raise
+    InvalidNameError.
+
+    All checks are done in a single traversal of the AST. Node type and name errors anywhere in the
+    AST take precedence over query type field name errors, which are only raised at the end.
     """
 
-    disallowed_types = frozenset(
+    disallowed_types: FrozenSet[Type[Node]] = frozenset(
         {  # types not supported in renaming or merging
-            "InputObjectTypeDefinitionNode",
-            "ObjectTypeExtensionNode",
+            InputObjectTypeDefinitionNode,
+            ObjectTypeExtensionNode,
         }
     )
-    unexpected_types = frozenset(
+    unexpected_types: FrozenSet[Type[Node]] = frozenset(
         {  # types not expected to be found in schema definition
-            "FieldNode",
-            "FragmentDefinitionNode",
-            "FragmentSpreadNode",
-            "InlineFragmentNode",
-            "ObjectFieldNode",
-            "ObjectValueNode",
-            "OperationDefinitionNode",
-            "SelectionSetNode",
-            "VariableNode",
-            "VariableDefinitionNode",
+            FieldNode,
+            FragmentDefinitionNode,
+            FragmentSpreadNode,
+            InlineFragmentNode,
+            ObjectFieldNode,
+            ObjectValueNode,
+            OperationDefinitionNode,
+            SelectionSetNode,
+            VariableNode,
+            VariableDefinitionNode,
         }
     )
-    check_name_validity_types = (
-        EnumTypeDefinitionNode,
-        InterfaceTypeDefinitionNode,
-        ObjectTypeDefinitionNode,
-        ScalarTypeDefinitionNode,
-        UnionTypeDefinitionNode,
+    # ObjectTypeDefinitionNode is left out: graphql-core never calls the generic enter method for
+    # it, since enter_object_type_definition exists, and that method runs the name check itself.
+    check_name_validity_types: FrozenSet[Type[Node]] = frozenset(
+        {
+            EnumTypeDefinitionNode,
+            InterfaceTypeDefinitionNode,
+            ScalarTypeDefinitionNode,
+            UnionTypeDefinitionNode,
+        }
     )
 
+    # Dispatch table from node class to the check that the generic enter method runs on nodes of
+    # that exact class, so that visiting a node costs a single dict lookup. Node types with their
+    # own enter_* method are checked there instead; all other node types not in the table need no
+    # checking. None of the node classes above have subclasses in graphql-core, so keying by exact
+    # class is equivalent to isinstance checks.
+    node_type_to_check: Dict[Type[Node], Callable[[Node], None]] = {
+        **dict.fromkeys(disallowed_types, _raise_disallowed_node_type_error),
+        **dict.fromkeys(unexpected_types, _raise_unexpected_node_type_error),
+        **dict.fromkeys(check_name_validity_types, _check_node_name_is_valid_nonreserved),
+    }
+
+    def __init__(self, query_type: str) -> None:
+        """Create a visitor for checking the schema AST.
+
+        Args:
+            query_type: name of the query type (e.g. RootSchemaQuery)
+        """
+        self.query_type = query_type
+        # Error for the first query type field whose name doesn't match the type it queries. It is
+        # only raised once the whole AST has been visited, so that node type and name errors
+        # anywhere in the AST take precedence over it.
+        self.query_type_field_error: Optional[SchemaStructureError] = None
+
     def enter(
         self, node: Node, key: Any, parent: Any, path: List[Any], ancestors: List[Any]
     ) -> None:
         """Raise error if node is of a invalid type or has an invalid name.
 
+        graphql-core calls this for every node kind without a more specific enter_* method below.
+
         Raises:
             - SchemaStructureError if the node is an InputObjectTypeDefinition,
               TypeExtensionDefinition, or a type that shouldn't exist in a schema definition
             - InvalidNameError if a node has an invalid name
         """
-        node_type = type(node).__name__
-        if node_type in self.disallowed_types:
-            raise SchemaStructureError('Node type "{}" not allowed.'.format(node_type))
-        elif node_type in self.unexpected_types:
-            raise SchemaStructureError('Node type "{}" unexpected in schema AST'.format(node_type))
-        elif isinstance(node, self.check_name_validity_types):
-            if not is_valid_nonreserved_name(node.name.value):
-                raise InvalidNameError(
-                    f"Node name {node.name.value} is not a valid, non-reserved GraphQL name. "
-                    f"Valid, non-reserved GraphQL names must consist of only alphanumeric "
-                    f"characters and underscores, must not start with a numeric character, and "
-                    f"must not start with double underscores."
-                )
-
-
-class CheckQueryTypeFieldsNameMatchVisitor(Visitor):
-    """Check that every query type field's name is identical to the type it queries.
-
-    If not, raise SchemaStructureError.
-    """
-
-    def __init__(self, query_type: str) -> None:
-        """Create a visitor for checking query type field names.
-
-        Args:
-            query_type: name of the query type (e.g. RootSchemaQuery)
-        """
-        self.query_type = query_type
-        self.in_query_type = False
+        check = self.node_type_to_check.get(type(node))
+        if check is not None:
+            check(node)
 
     def enter_object_type_definition(
         self,
@@ -577,45 +677,44 @@ class CheckQueryTypeFieldsNameMatchVisitor(Visitor):
         path: List[Any],
         ancestors: List[Any],
     ) -> None:
-        """If the node's name matches the query type, record that we entered the query type."""
-        if node.name.value == self.query_type:
-            self.in_query_type = True
+        """Check the node's name and, if it is the query type, the names of its fields.
 
-    def leave_object_type_definition(
-        self,
-        node: ObjectTypeDefinitionNode,
-        key: Any,
-        parent: Any,
-        path: List[Any],
-        ancestors: List[Any],
-    ) -> None:
-        """If the node's name matches the query type, record that we left the query type."""
+        The query type's fields are checked here directly rather than in a separate
+        enter_field_definition callback, so that the visitor doesn't need to track whether it is
+        inside the query type, and field definitions of other types need no callback at all.
+
+        A query type field whose name is not identical to the name of the type it queries is only
+        recorded here, and the error is raised by leave_document.
+
+        Raises:
+            - InvalidNameError if the node has an invalid name
+        """
+        # The generic enter method is not called for object type definitions, so the name check
+        # that other type definitions get through node_type_to_check is run explicitly here.
+        _check_node_name_is_valid_nonreserved(node)
         if node.name.value == self.query_type:
-            self.in_query_type = False
+            for field_definition in node.fields:
+                field_name = field_definition.name.value
+                type_node = get_ast_with_non_null_and_list_stripped(field_definition.type)
+                queried_type_name = type_node.name.value
+                if field_name != queried_type_name:
+                    self.query_type_field_error = SchemaStructureError(
+                        'Query type\'s field name "{}" does not match corresponding queried type '
+                        'name "{}"'.format(field_name, queried_type_name)
+                    )
+                    return
 
-    def enter_field_definition(
-        self,
-        node: FieldDefinitionNode,
-        key: Any,
-        parent: Any,
-        path: List[Any],
-        ancestors: List[Any],
+    def leave_document(
+        self, node: DocumentNode, key: Any, parent: Any, path: List[Any], ancestors: List[Any]
     ) -> None:
-        """If inside the query type, check that the field and queried type names match.
+        """Raise the query type field error, if any, once the whole AST has been checked.
 
         Raises:
-            - SchemaStructureError if the field name is not identical to the name of the type
-              that it queries
+            - SchemaStructureError if one of the query type's field names is not identical to the
+              name of the type that it queries
         """
-        if self.in_query_type:
-            field_name = node.name.value
-            type_node = get_ast_with_non_null_and_list_stripped(node.type)
-            queried_type_name = type_node.name.value
-            if field_name != queried_type_name:
-                raise SchemaStructureError(
-                    'Query type\'s field name "{}" does not match corresponding queried type '
-                    'name "{}"'.format(field_name, queried_type_name)
-                )
+        if self.query_type_field_error is not None:
+            raise self.query_type_field_error
 
 
 def check_ast_schema_is_valid(ast: DocumentNode) -> None:
@@ -646,10 +745,8 @@ def check_ast_schema_is_valid(ast: DocumentNode) -> None:
             "Renaming schemas that contain subscriptions is currently not supported."
         )
 
-    visit(ast, CheckValidTypesAndNamesVisitor())
-
     query_type = get_query_type_name(schema)
-    visit(ast, CheckQueryTypeFieldsNameMatchVisitor(query_type))
+    visit(ast, CheckAstSchemaIsValidVisitor(query_type))
 
 
 def is_property_field_ast(field: FieldNode) -> bool:
@@ -712,41 +809,46 @@ class CheckQueryIsValidToSplitVisitor(Visitor):
                        which contain the parent of visited node.
         """
         selections = node.selections
-        if len(selections) == 1 and isinstance(selections[0], InlineFragmentNode):
+        # The selection node classes are concrete graphql-core AST classes without subclasses, so
+        # comparing exact types is equivalent to, and cheaper than, isinstance checks.
+        if len(selections) == 1 and type(selections[0]) is InlineFragmentNode:
             return
         else:
             seen_vertex_field = False  # Whether we're seen a vertex field
             for field in selections:
-                if isinstance(field, InlineFragmentNode):
+                if type(field) is FieldNode:
+                    # Same check as is_property_field_ast(), inlined since field is known to be a
+                    # FieldNode here and this runs for every field in the query.
+                    field_selection_set = field.selection_set
+                    if field_selection_set is None or not field_selection_set.selections:
+                        if seen_vertex_field:
+                            raise GraphQLValidationError(
+                                "In the selections {}, the property field {} occurs after a "
+                                "vertex field or a type coercion statement, which is not allowed, "
+                                "as all property fields must appear before all vertex "
+                                "fields.".format(node.selections, field)
+                            )
+                    else:
+                        seen_vertex_field = True
+                elif type(field) is InlineFragmentNode:
                     raise GraphQLValidationError(
                         "Inline fragments must be the only selection in scope. However, in "
                         "selections {}, an InlineFragment coexists with other selections.".format(
                             selections
                         )
                     )
-                if isinstance(field, FragmentSpreadNode):
+                elif type(field) is FragmentSpreadNode:
                     raise GraphQLValidationError(
                         f"Fragments (not to be confused with inline fragments) are not supported "
                         f"by the compiler. However, in SelectionSetNode {node}'s selections "
                         f"attribute {selections}, the field {field} is a FragmentSpreadNode named "
                         f"{field.name.value}."
                     )
-                if not isinstance(field, FieldNode):
+                else:
                     raise AssertionError(
                         f"The SelectionNode {field} in SelectionSetNode {node}'s selections "
                         f"attribute is not a FieldNode but instead has type {type(field)}."
                     )
-                if is_property_field_ast(field):
-                    if seen_vertex_field:
-                        raise GraphQLValidationError(
-                            "In the selections {}, the property field {} occurs after a vertex "
-                            "field or a type coercion statement, which is not allowed, as all "
-                            "property fields must appear before all vertex fields.".format(
-                                node.selections, field
-                            )
-                        )
-                else:
-                    seen_vertex_field = True
 
 
 def check_query_is_valid_to_split(schema: GraphQLSchema, query_ast: DocumentNode) -> None:
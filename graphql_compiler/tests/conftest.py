@@ -1,8 +1,13 @@
 # Copyright 2018-present Kensho Technologies, LLC.
+from contextlib import suppress
+from typing import Dict, List
 
 from funcy import retry
+from neo4j.exceptions import ServiceUnavailable
+from pyorient import OrientDB
+from pyorient.exceptions import PyOrientConnectionException
 import pytest
-import six
+from redis.exceptions import ConnectionError as RedisConnectionError
 
 from .test_data_tools.data_tool import (
     generate_neo4j_integration_data,
@@ -14,13 +19,31 @@ from .test_data_tools.data_tool import (
     tear_down_integration_test_backends,
 )
 from .test_data_tools.neo4j_graph import get_test_neo4j_graph
-from .test_data_tools.orientdb_graph import get_test_orientdb_graph
+from .test_data_tools.orientdb_graph import ORIENTDB_PORT, ORIENTDB_SERVER, get_test_orientdb_graph
 from .test_data_tools.redisgraph_graph import get_test_redisgraph_graph
 from .test_data_tools.schema import load_schema
+from .test_helpers import get_schema, get_test_macro_registry
 
 
 GRAPH_NAME = "animals"  # Name for integration test database
 
+# Number of attempts made to connect to each test database, which may still be starting up.
+DB_CONNECTION_TRIES = 20
+
+
+def _get_db_connection_retry_delay(attempt):
+    """Return the seconds to wait after the given failed attempt: 0.1s, doubling up to 2s."""
+    return min(2.0, 0.1 * 2 ** attempt)
+
+
+# OrientDB clients, keyed by graph name. The snapshot and integration fixtures rebuild the same
+# graph, so they share one server connection instead of each opening their own. Both fixtures
+# already drop and recreate that graph, so only the most recently loaded test data is present.
+_orientdb_clients: Dict[str, OrientDB] = {}
+# Every OrientDB client returned by a fixture. A client may still be in use by test classes after
+# it has left the pool, so clients are only closed once the whole session is finished.
+_returned_orientdb_clients: List[OrientDB] = []
+
 
 # Pytest fixtures depend on name redefinitions to work,
 # so this check generates tons of false-positives here.
@@ -43,10 +66,38 @@ def init_integration_orientdb_client():
 # parameter "call". Call is the function being decorated, so we don't need to specify which
 # parameters the retry decorator takes. So, we can disable pylint's warning about
 # missing parameters here.
-@retry(20, timeout=1)  # pylint: disable=no-value-for-parameter
+# Only connection errors are retried, since the database may still be starting up. Any other error
+# is a real problem with the test setup, so it is raised immediately instead of being retried.
+@retry(  # pylint: disable=no-value-for-parameter
+    DB_CONNECTION_TRIES,
+    errors=(PyOrientConnectionException, OSError),
+    timeout=_get_db_connection_retry_delay,
+)
 def _init_orientdb_client(load_schema_func, generate_data_func):
     """Set up a database and return a client that can query the database."""
-    orientdb_client = get_test_orientdb_graph(GRAPH_NAME, load_schema_func, generate_data_func)
+    # The client is only put back in the pool once setup succeeds, so that a retry after a failed
+    # setup opens a fresh connection.
+    pooled_client = _orientdb_clients.pop(GRAPH_NAME, None)
+    if pooled_client is not None:
+        orientdb_client = pooled_client
+    else:
+        orientdb_client = OrientDB(host=ORIENTDB_SERVER, port=ORIENTDB_PORT)
+    try:
+        get_test_orientdb_graph(
+            GRAPH_NAME, load_schema_func, generate_data_func, client=orientdb_client
+        )
+    except Exception:
+        # A pooled client was already returned by another fixture, and its test classes may still
+        # hold it, so it is left open until the session finishes. A client opened by this call is
+        # closed so that its socket isn't leaked. Its connection may already be broken, so a
+        # failure to close it must not hide the original error.
+        if pooled_client is None:
+            with suppress(PyOrientConnectionException, OSError):
+                orientdb_client.close()
+        raise
+    _orientdb_clients[GRAPH_NAME] = orientdb_client
+    if pooled_client is None:
+        _returned_orientdb_clients.append(orientdb_client)
     return orientdb_client
 
 
@@ -58,7 +109,11 @@ def init_integration_neo4j_client():
 
 # We can disable pylint's warning about missing parameters here because retry is a decorator. See
 # _init_orientdb_client function comment.
-@retry(20, timeout=1)  # pylint: disable=no-value-for-parameter
+@retry(  # pylint: disable=no-value-for-parameter
+    DB_CONNECTION_TRIES,
+    errors=(ServiceUnavailable, OSError),
+    timeout=_get_db_connection_retry_delay,
+)
 def _init_neo4j_client(generate_data_func):
     """Set up a database and return a client that can query the database."""
     neo4j_client = get_test_neo4j_graph(GRAPH_NAME, generate_data_func)
@@ -73,7 +128,11 @@ def init_integration_redisgraph_client():
 
 # We can disable pylint's warning about missing parameters here because retry is a decorator. See
 # _init_orientdb_client function comment.
-@retry(20, timeout=1)  # pylint: disable=no-value-for-parameter
+@retry(  # pylint: disable=no-value-for-parameter
+    DB_CONNECTION_TRIES,
+    errors=(RedisConnectionError, OSError),
+    timeout=_get_db_connection_retry_delay,
+)
 def _init_redisgraph_client(generate_data_func):
     """Set up a database and return a client that can query the database."""
     redisgraph_client = get_test_redisgraph_graph(GRAPH_NAME, generate_data_func)
@@ -104,25 +163,72 @@ def integration_redisgraph_client(request, init_integration_redisgraph_client):
     request.cls.redisgraph_client = init_integration_redisgraph_client
 
 
+@pytest.fixture(scope="session")
+def init_integration_schema():
+    """Return the schema used in integration tests, built once per test session."""
+    return get_schema()
+
+
 @pytest.fixture(scope="class")
-def sql_integration_data(request):
-    """Generate integration data for SQL backends."""
+def integration_schema(request, init_integration_schema):
+    """Get the schema used in integration tests. Tests must not modify it."""
+    request.cls.schema = init_integration_schema
+
+
+@pytest.fixture(scope="session")
+def init_macro_registry():
+    """Return a MacroRegistry with the macros used in tests, built once per test session."""
+    return get_test_macro_registry()
+
+
+@pytest.fixture(scope="class")
+def macro_registry(request, init_macro_registry):
+    """Get a MacroRegistry with the macros used in tests. Tests must not modify it."""
+    request.cls.macro_registry = init_macro_registry
+
+
+@pytest.fixture(scope="session")
+def init_sql_integration_data():
+    """Generate integration data for SQL backends once per test session.
+
+    Returns:
+        tuple (sql_backend_name_to_engine, sql_schema_info) where sql_backend_name_to_engine maps
+        each SQL backend name to the engine connected to its test DB, and sql_schema_info maps each
+        SQL backend name to the SQLAlchemySchemaInfo describing its test data
+    """
     # initialize each SQL backend
     sql_test_backends = init_sql_integration_test_backends()
     sql_schema_info = generate_sql_integration_data(sql_test_backends)
-    # make sql engines accessible within the test class
-    request.cls.sql_backend_name_to_engine = {
+    sql_backend_name_to_engine = {
         backend_name: sql_test_backend.engine
-        for backend_name, sql_test_backend in six.iteritems(sql_test_backends)
+        for backend_name, sql_test_backend in sql_test_backends.items()
     }
-    request.cls.sql_schema_info = sql_schema_info
-    # yield the fixture to allow testing class to run
-    yield
-    # tear down the fixture after the testing class runs all tests
-    # including rolling back transaction to ensure all fixture data removed.
+    # yield the fixture to allow all tests in the session to run
+    yield sql_backend_name_to_engine, sql_schema_info
+    # tear down the fixture after all tests in the session have run,
+    # including dropping the test DBs to ensure all fixture data is removed.
     tear_down_integration_test_backends(sql_test_backends)
 
 
+@pytest.fixture(scope="class")
+def sql_integration_data(request, init_sql_integration_data):
+    """Get the engines and schema info for SQL backends with integration data loaded."""
+    sql_backend_name_to_engine, sql_schema_info = init_sql_integration_data
+    # make sql engines accessible within the test class
+    request.cls.sql_backend_name_to_engine = sql_backend_name_to_engine
+    request.cls.sql_schema_info = sql_schema_info
+
+
+def pytest_sessionfinish():
+    """Close the OrientDB clients opened by the test session."""
+    for orientdb_client in _returned_orientdb_clients:
+        # A client whose pooled setup failed may have a broken connection.
+        with suppress(PyOrientConnectionException, OSError):
+            orientdb_client.close()
+    _returned_orientdb_clients.clear()
+    _orientdb_clients.clear()
+
+
 def pytest_addoption(parser):
     """Add command line options to py.test to allow for slow tests to be skipped."""
     parser.addoption("--skip-slow", action="store_true", default=False, help="Skip slow tests.")
@@ -4,7 +4,6 @@ from typing import Any, Dict, List, Tuple, TypeVar, Union
 
 from pyorient.orient import OrientDB
 from redisgraph.client import Graph
-import six
 from sqlalchemy.engine.base import Engine
 
 from graphql_compiler.schema.schema_info import SQLAlchemySchemaInfo
@@ -35,7 +34,7 @@ def sort_db_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     sort_order: List[str] = []
     if len(results) > 0:
-        sort_order = sorted(six.iterkeys(results[0]))
+        sort_order = sorted(results[0].keys())
 
     def sort_key(result: Dict[str, Any]) -> Tuple[Tuple[bool, Any], ...]:
         """Convert None/Not None to avoid comparisons of None to a non-None type."""
@@ -47,9 +46,7 @@ def sort_db_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             return sorted(value)
         return value
 
-    return sorted(
-        [{k: sorted_value(v) for k, v in six.iteritems(row)} for row in results], key=sort_key
-    )
+    return sorted([{k: sorted_value(v) for k, v in row.items()} for row in results], key=sort_key)
 
 
 def try_convert_decimal_to_string(value: T) -> Any:
@@ -70,7 +67,7 @@ def compile_and_run_match_query(
     """Compile and run a MATCH query against the supplied graph client."""
     # MATCH code emitted by the compiler expects Decimals to be passed in as strings
     converted_parameters = {
-        name: try_convert_decimal_to_string(value) for name, value in six.iteritems(parameters)
+        name: try_convert_decimal_to_string(value) for name, value in parameters.items()
     }
     compilation_result = graphql_to_match(common_schema_info, graphql_query, converted_parameters)
 
@@ -30,7 +30,6 @@ from ..test_helpers import (
     compare_schema_texts_order_independently,
     generate_schema,
     generate_schema_graph,
-    get_schema,
 )
 from .integration_backend_config import (
     MATCH_BACKENDS,
@@ -92,12 +91,12 @@ def use_all_backends(except_backends: Tuple[str, ...] = ()) -> Callable:
 # does not recognize
 # pylint: disable=no-member
 @pytest.mark.slow
+@pytest.mark.usefixtures("integration_schema")
 class IntegrationTests(TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        """Initialize the test schema once for all tests, and disable max diff limits."""
+        """Disable max diff limits for all tests."""
         cls.maxDiff = None
-        cls.schema = get_schema()  # type: ignore  # we are adding an attribute to the object
 
     def assertResultsEqual(
         self,
@@ -134,6 +134,32 @@ class TestCheckSchemaValid(unittest.TestCase):
         with self.assertRaises(SchemaStructureError):
             check_ast_schema_is_valid(parse(schema_string))
 
+    def test_invalid_name_takes_precedence_over_inconsistent_root_field_name(self):
+        # The query type comes before the type with the invalid name, but the invalid name is
+        # still reported first, since query type fields are only checked after the whole schema.
+        schema_string = dedent(
+            """\
+            schema {
+              query: SchemaQuery
+            }
+
+            type SchemaQuery {
+              Foo: Foo
+              Wrong: Foo
+            }
+
+            type Foo {
+              name: String
+            }
+
+            type __Bad {
+              x: String
+            }
+        """
+        )
+        with self.assertRaises(InvalidNameError):
+            check_ast_schema_is_valid(parse(schema_string))
+
     def test_illegal_double_underscore_name(self):
         schema_string = dedent(
             """\
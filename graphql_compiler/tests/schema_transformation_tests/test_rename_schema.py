@@ -4,6 +4,7 @@ from typing import Set
 import unittest
 
 from graphql import parse
+from graphql.language.ast import ObjectTypeDefinitionNode
 from graphql.language.printer import print_ast
 from graphql.language.visitor import QUERY_DOCUMENT_KEYS
 from graphql.pyutils import snake_to_camel
@@ -102,6 +103,17 @@ class TestRenameSchema(unittest.TestCase):
         rename_schema(original_ast, {"Human": "NewHuman"}, {})
         self.assertEqual(original_ast, parse(ISS.basic_schema))
 
+    def test_modifying_output_does_not_affect_later_renames(self) -> None:
+        first_renamed_schema = rename_schema(parse(ISS.basic_schema), {"Human": "NewHuman"}, {})
+        expected_schema_string = print_ast(first_renamed_schema.schema_ast)
+        # Callers own the returned AST, and graphql-core AST nodes are mutable.
+        for definition in first_renamed_schema.schema_ast.definitions:
+            if isinstance(definition, ObjectTypeDefinitionNode):
+                definition.name.value = "Modified"
+
+        second_renamed_schema = rename_schema(parse(ISS.basic_schema), {"Human": "NewHuman"}, {})
+        self.assertEqual(expected_schema_string, print_ast(second_renamed_schema.schema_ast))
+
     def test_original_unmodified_suppress(self) -> None:
         original_ast = parse(ISS.multiple_objects_schema)
         rename_schema(original_ast, {"Human": None}, {})
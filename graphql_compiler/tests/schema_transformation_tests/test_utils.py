@@ -0,0 +1,42 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+import unittest
+
+from graphql.language.ast import ArgumentNode, DirectiveNode, NameNode, SelectionSetNode
+
+from ...schema_transformation.utils import index_asts_by_name
+
+
+def _make_directive(name: str) -> DirectiveNode:
+    """Return a DirectiveNode with the given name and no arguments."""
+    return DirectiveNode(name=NameNode(value=name), arguments=[])
+
+
+class TestIndexAstsByName(unittest.TestCase):
+    def test_index_asts_by_name(self) -> None:
+        filter_directive = _make_directive("filter")
+        optional_directive = _make_directive("optional")
+        self.assertEqual(
+            {"filter": filter_directive, "optional": optional_directive},
+            index_asts_by_name([filter_directive, optional_directive], DirectiveNode),
+        )
+
+    def test_last_ast_with_duplicate_name_wins(self) -> None:
+        first_filter_directive = _make_directive("filter")
+        second_filter_directive = _make_directive("filter")
+        index = index_asts_by_name([first_filter_directive, second_filter_directive], DirectiveNode)
+        self.assertEqual(["filter"], list(index))
+        self.assertIs(second_filter_directive, index["filter"])
+
+    def test_none_asts(self) -> None:
+        self.assertEqual({}, index_asts_by_name(None, DirectiveNode))
+
+    def test_asts_of_other_types_are_ignored(self) -> None:
+        directive = _make_directive("filter")
+        argument = ArgumentNode(name=NameNode(value="op_name"), value=None)
+        self.assertEqual(
+            {"filter": directive}, index_asts_by_name([argument, directive], DirectiveNode)
+        )
+
+    def test_target_type_without_name(self) -> None:
+        with self.assertRaises(AssertionError):
+            index_asts_by_name([], SelectionSetNode)
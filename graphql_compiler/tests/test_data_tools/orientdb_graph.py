@@ -1,9 +1,8 @@
 # Copyright 2018-present Kensho Technologies, LLC.
-from typing import Callable
+from typing import Callable, Optional
 
 from pyorient import OrientDB
-from pyorient.constants import DB_TYPE_GRAPH
-from pyorient.ogm import Config, Graph
+from pyorient.constants import DB_TYPE_GRAPH, STORAGE_TYPE_MEMORY
 
 
 ORIENTDB_SERVER = "localhost"
@@ -12,24 +11,24 @@ ORIENTDB_USER = "root"
 ORIENTDB_PASSWORD = "root"  # nosec
 
 
-def get_orientdb_url(database_name: str) -> str:
-    """Return an OrientDB path for the specified database on the ORIENTDB_SERVER."""
-    template = "memory://{}:{}/{}"
-    return template.format(ORIENTDB_SERVER, ORIENTDB_PORT, database_name)
-
-
 def get_test_orientdb_graph(
     graph_name: str,
     load_schema_func: Callable[[OrientDB], None],
     generate_data_func: Callable[[OrientDB], None],
+    client: Optional[OrientDB] = None,
 ) -> OrientDB:
-    """Generate the test database and return the pyorient client."""
-    url = get_orientdb_url(graph_name)
-    config = Config.from_url(url, ORIENTDB_USER, ORIENTDB_PASSWORD, initial_drop=True)
-    Graph(config, strict=True)
+    """Generate the test database and return the pyorient client.
 
-    client = OrientDB(host="localhost", port=ORIENTDB_PORT)
+    If a client is given, its server connection is reused to rebuild the database, instead of
+    opening a new connection. Any database with the same name is dropped and recreated.
+    """
+    if client is None:
+        client = OrientDB(host=ORIENTDB_SERVER, port=ORIENTDB_PORT)
     client.connect(ORIENTDB_USER, ORIENTDB_PASSWORD)
+
+    if client.db_exists(graph_name, STORAGE_TYPE_MEMORY):
+        client.db_drop(graph_name, STORAGE_TYPE_MEMORY)
+    client.db_create(graph_name, DB_TYPE_GRAPH, STORAGE_TYPE_MEMORY)
     client.db_open(graph_name, ORIENTDB_USER, ORIENTDB_PASSWORD, db_type=DB_TYPE_GRAPH)
 
     load_schema_func(client)
@@ -1,25 +1,38 @@
 # Copyright 2019-present Kensho Technologies, LLC.
+from functools import lru_cache
+from typing import FrozenSet
 import unittest
 
-from graphql.type import GraphQLList
+from graphql.type import GraphQLList, GraphQLSchema
 from graphql.utilities import print_schema
 from graphql.validation import validate
+import pytest
 
 from ..ast_manipulation import safe_parse_graphql
-from ..macros import get_schema_for_macro_definition, get_schema_with_macros
+from ..macros import MacroRegistry, get_schema_for_macro_definition, get_schema_with_macros
 from ..macros.macro_edge.directives import (
     DIRECTIVES_ALLOWED_IN_MACRO_EDGE_DEFINITION,
     DIRECTIVES_REQUIRED_IN_MACRO_EDGE_DEFINITION,
 )
 from ..schema import OutputDirective, OutputSourceDirective
-from .test_helpers import VALID_MACROS_TEXT, get_empty_test_macro_registry, get_test_macro_registry
+from .test_helpers import VALID_MACROS_TEXT, get_empty_test_macro_registry
 
 
+@lru_cache(maxsize=None)
+def _get_macro_definition_schema_directive_names(schema: GraphQLSchema) -> FrozenSet[str]:
+    """Return the names of the directives in the macro definition schema for the given schema."""
+    macro_definition_schema = get_schema_for_macro_definition(schema)
+    return frozenset(directive.name for directive in macro_definition_schema.directives)
+
+
+@pytest.mark.usefixtures("macro_registry")
 class MacroSchemaTests(unittest.TestCase):
-    def setUp(self) -> None:
+    macro_registry: MacroRegistry  # set by the macro_registry fixture
+
+    @classmethod
+    def setUpClass(cls) -> None:
         """Disable max diff limits for all tests."""
-        self.maxDiff = None
-        self.macro_registry = get_test_macro_registry()
+        cls.maxDiff = None
 
     def test_get_schema_with_macros_original_schema_unchanged(self) -> None:
         empty_macro_registry = get_empty_test_macro_registry()
@@ -43,20 +56,15 @@ class MacroSchemaTests(unittest.TestCase):
         self.assertEqual("Food", related_food_target_type.of_type.name)
 
     def test_get_schema_for_macro_definition_addition(self) -> None:
-        original_schema = self.macro_registry.schema_without_macros
-        macro_definition_schema = get_schema_for_macro_definition(original_schema)
-        macro_schema_directive_names = {
-            directive.name for directive in macro_definition_schema.directives
-        }
+        macro_schema_directive_names = _get_macro_definition_schema_directive_names(
+            self.macro_registry.schema_without_macros
+        )
         for directive in DIRECTIVES_REQUIRED_IN_MACRO_EDGE_DEFINITION:
             self.assertIn(directive, macro_schema_directive_names)
 
     def test_get_schema_for_macro_definition_retain(self) -> None:
         original_schema = self.macro_registry.schema_without_macros
-        macro_definition_schema = get_schema_for_macro_definition(original_schema)
-        macro_schema_directive_names = {
-            directive.name for directive in macro_definition_schema.directives
-        }
+        macro_schema_directive_names = _get_macro_definition_schema_directive_names(original_schema)
         for directive in original_schema.directives:
             if directive.name in DIRECTIVES_ALLOWED_IN_MACRO_EDGE_DEFINITION:
                 self.assertIn(directive.name, macro_schema_directive_names)